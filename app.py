@@ -1,11 +1,10 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import pyarrow.feather as feather
-import streamlit.components.v1 as components
 from data_processor_chunked import DataProcessor
 from visualization import VisualizationGenerator
-import os
+import re
+from urllib.parse import urlsplit
 
 # Configure page
 st.set_page_config(
@@ -14,41 +13,213 @@ st.set_page_config(
     layout="wide"
 )
 
-# Cache data loading for better performance
-@st.cache_data
+# Sidebar filter name -> HOF enhancers column it filters on
+FILTER_COLUMNS = {
+    'enhancer': 'enhancer_id',
+    'cargo': 'cargo',
+    'experiment': 'experiment',
+    'gene': 'proximal_gene',
+    'gc_delivered': 'gc_delivered'
+}
+
+# HOF enhancer columns that may hold imaging viewer links
+URL_COLUMNS = ['image_link', 'neuroglancer_1', 'neuroglancer_3', 'viewer_link', 'coronal_mip', 'sagittal_mip']
+
+# Links that point straight at an image file browsers can display; TIFFs stay on the iframe path
+STATIC_IMAGE_URL = re.compile(r'\.(png|jpe?g)$', re.IGNORECASE)
+
+# Leading number of cell type names like "11_CNU_HYa_GABA"
+CELL_TYPE_NUMBER = re.compile(r'^(\d+)')
+
+# Markers that classify comma-separated image_link URLs
+CONTACT_SHEET_URL = re.compile(r'contact_sheets', re.IGNORECASE)
+NEUROGLANCER_URL = re.compile(r'neuroglancer', re.IGNORECASE)
+
+# Viewer group of each imaging viewer title; other viewers go after all groups
+VIEWER_GROUPS = {
+    'Contact Sheet': 'contact_sheet',
+    'Neuroglancer (Primary)': 'neuroglancer',
+    'Neuroglancer 1': 'neuroglancer',
+    'Neuroglancer 3': 'neuroglancer',
+    'Coronal MIP': 'mip',
+    'Sagittal MIP': 'mip'
+}
+
+# Display rank of the viewer groups per experiment type
+VIEWER_GROUP_RANK = {
+    experiment: {group: rank for rank, group in enumerate(groups)}
+    for experiment, groups in {
+        'lightsheet': ('neuroglancer', 'mip', 'contact_sheet'),
+        'epi': ('contact_sheet', 'neuroglancer', 'mip'),
+        'default': ('neuroglancer', 'contact_sheet', 'mip')
+    }.items()
+}
+
+# One DataProcessor for the whole server - it outlives load_data cache invalidations
+@st.cache_resource
+def get_processor():
+    return DataProcessor()
+
+# Cache data loading for better performance - as a resource, so reruns share the loaded
+# tables instead of unpickling a fresh copy of the peak data every time (nothing mutates them)
+@st.cache_resource
 def load_data():
     """Load and process all data files - cached for performance"""
-    processor = DataProcessor()
-    result = processor.load_all_data()
+    result = get_processor().load_all_data()
     
     if result and len(result) == 3:
         peak_data, metadata, hof_enhancers = result
         
         # Clean any remaining NaN values in HOF enhancers
         if hof_enhancers is not None and not hof_enhancers.empty:
+            # Missing or empty filter values get one meaningful placeholder in a single masked pass
+            fill_columns = [col for col in ['cargo', 'experiment', 'proximal_gene', 'gc_delivered'] if col in hof_enhancers.columns]
+            fill_values = hof_enhancers[fill_columns]
+            hof_enhancers[fill_columns] = fill_values.where(fill_values.notna() & (fill_values != ''), 'Not Available')
+            
+            # Empty string for any remaining NaN values
             hof_enhancers = hof_enhancers.fillna('')
             
-            # Replace empty strings with more meaningful values where appropriate
-            for col in ['cargo', 'experiment', 'proximal_gene', 'gc_delivered']:
+            # Store filter columns as categoricals so filtering compares integer codes
+            for col in FILTER_COLUMNS.values():
+                if col in hof_enhancers.columns:
+                    hof_enhancers[col] = hof_enhancers[col].astype('category')
+            
+            # Flag usable links with one vectorized pass per column
+            for col in URL_COLUMNS:
                 if col in hof_enhancers.columns:
-                    hof_enhancers[col] = hof_enhancers[col].replace('', 'Not Available')
+                    hof_enhancers[f'{col}_valid'] = hof_enhancers[col].astype(str).str.startswith('http')
+            
+            # Classify imaging viewers once instead of on every render
+            hof_enhancers['imaging_urls'] = hof_enhancers.apply(build_imaging_urls, axis=1)
+        
+        # Sort cell types numerically by their leading numbers (1-34) once, at load time
+        base_cell_types = ()
+        if peak_data is not None and not peak_data.empty:
+            cell_types = pd.Series(peak_data['cell_type'].cat.categories)
+            ranks = cell_types.str.extract(CELL_TYPE_NUMBER, expand=False).fillna(999).astype(np.int32).to_numpy()
+            base_cell_types = tuple(cell_types.to_numpy()[ranks.argsort(kind='stable')])
+        
+        # Positional row indices per enhancer so filtering is a gather instead of a full scan
+        peak_index = peak_data.groupby('enhancer_id', sort=False, observed=True).indices if peak_data is not None and not peak_data.empty else {}
+        peak_cell_index = peak_data.groupby(['enhancer_id', 'cell_type'], sort=False, observed=True).indices if peak_data is not None and not peak_data.empty else {}
+        hof_index = hof_enhancers.groupby('enhancer_id', sort=False, observed=True).indices if hof_enhancers is not None and not hof_enhancers.empty else {}
+        
+        # Top 5 cell types by mean accessibility for every enhancer, looked up at render time
+        top_cell_types_by_enhancer = pd.Series(dtype=float)
+        if peak_data is not None and not peak_data.empty:
+            means = peak_data.groupby(['enhancer_id', 'cell_type'], observed=True)['accessibility_score'].mean()
+            top_cell_types_by_enhancer = means.groupby(level='enhancer_id', group_keys=False, observed=True).nlargest(5)
         
-        return peak_data, metadata, hof_enhancers
+        # Codes of all filter columns stacked into one (rows x filters) matrix, in FILTER_COLUMNS order
+        filter_index = {}
+        if hof_enhancers is not None and not hof_enhancers.empty:
+            categories = {col: hof_enhancers[col].cat.categories.to_numpy() for col in FILTER_COLUMNS.values()}
+            code_dtype = np.int16 if max(len(cats) for cats in categories.values()) < np.iinfo(np.int16).max else np.int32
+            filter_index = {
+                'matrix': np.column_stack([hof_enhancers[col].cat.codes.to_numpy() for col in FILTER_COLUMNS.values()]).astype(code_dtype),
+                'categories': categories,
+                'code_maps': {col: {value: code for code, value in enumerate(cats)} for col, cats in categories.items()}
+            }
+        
+        return peak_data, metadata, hof_enhancers, peak_index, peak_cell_index, hof_index, base_cell_types, top_cell_types_by_enhancer, filter_index
     else:
         st.error("Failed to load data properly")
-        return None, None, None
+        return None, None, None, {}, {}, {}, (), pd.Series(dtype=float), {}
+
+def build_imaging_urls(enhancer_row):
+    """Collect the (title, url) imaging viewers available for one HOF enhancer row"""
+    # Extract imaging information
+    image_link = enhancer_row.get('image_link', '')
+    neuroglancer_1 = enhancer_row.get('neuroglancer_1', '')
+    neuroglancer_3 = enhancer_row.get('neuroglancer_3', '')
+    viewer_link = enhancer_row.get('viewer_link', '')
+    coronal_mip = enhancer_row.get('coronal_mip', '')
+    sagittal_mip = enhancer_row.get('sagittal_mip', '')
+    
+    # Create imaging URLs list
+    imaging_urls = []
+    
+    # Handle image_link based on experiment type and content
+    if enhancer_row.get('image_link_valid', False):
+        url_parts = [url.strip() for url in image_link.split(',')]
+        for url in url_parts:
+            if url.startswith('http'):
+                if CONTACT_SHEET_URL.search(url):
+                    imaging_urls.append(('Contact Sheet', url))
+                elif NEUROGLANCER_URL.search(url):
+                    imaging_urls.append(('Neuroglancer (Primary)', url))
+                else:
+                    imaging_urls.append(('Image Viewer', url))
+    
+    # Add dedicated neuroglancer viewers
+    if enhancer_row.get('neuroglancer_1_valid', False):
+        imaging_urls.append(('Neuroglancer 1', neuroglancer_1))
+    if enhancer_row.get('neuroglancer_3_valid', False):
+        imaging_urls.append(('Neuroglancer 3', neuroglancer_3))
+    
+    # Add viewer link
+    if enhancer_row.get('viewer_link_valid', False):
+        imaging_urls.append(('Viewer', viewer_link))
+    
+    # Add MIP projections (exclude 'FALSE' values)
+    if enhancer_row.get('coronal_mip_valid', False) and coronal_mip.upper() != 'FALSE':
+        imaging_urls.append(('Coronal MIP', coronal_mip))
+    if enhancer_row.get('sagittal_mip_valid', False) and sagittal_mip.upper() != 'FALSE':
+        imaging_urls.append(('Sagittal MIP', sagittal_mip))
+    
+    return order_imaging_viewers(imaging_urls, enhancer_row.get('experiment', ''))
+
+def order_imaging_viewers(imaging_urls, experiment):
+    """Order the (title, url) viewers so the primary ones for the experiment type come first"""
+    current_experiment = str(experiment).lower()
+    if 'lightsheet' in current_experiment:
+        group_rank = VIEWER_GROUP_RANK['lightsheet']
+    elif 'epi' in current_experiment:
+        group_rank = VIEWER_GROUP_RANK['epi']
+    else:
+        # Default for STPT, SSv4, etc.
+        group_rank = VIEWER_GROUP_RANK['default']
+    
+    # Stable sort keeps the collected order within each viewer group
+    return sorted(imaging_urls, key=lambda viewer: group_rank.get(VIEWER_GROUPS.get(viewer[0]), len(group_rank)))
+
+def render_viewer(url):
+    """Show a static image with st.image, and embed viewer applications in an iframe"""
+    if STATIC_IMAGE_URL.search(urlsplit(url).path):
+        st.image(url, width='stretch')
+    else:
+        st.markdown(
+            f'<iframe src="{url}" width="100%" height="700" frameborder="0" '
+            f'style="border: 1px solid #ccc; border-radius: 4px;"></iframe>', 
+            unsafe_allow_html=True
+        )
+
+def arrow_display(df):
+    """Arrow-backed copy of a table for st.dataframe, which ships tables to the browser as Arrow"""
+    return df.convert_dtypes(dtype_backend='pyarrow')
+
+# One visualization generator shared by all sessions and reruns
+@st.cache_resource
+def get_visualization_generator():
+    return VisualizationGenerator()
+
+# Cache the accessibility figure per enhancer and cell type filter - the peak rows behind it
+# come straight from the load-time indices, so the pair fully determines the figure
+@st.cache_data(max_entries=64, show_spinner=False)
+def build_peak_figure(enhancer_id, cell_type, _enhancer_peak_data):
+    """Generate the pyGenomeTracks-style figure for one enhancer"""
+    fig = get_visualization_generator().create_peak_visualization(_enhancer_peak_data, enhancer_id)
+    # Make visualization taller for enhanced track visibility
+    fig.update_layout(height=2000)
+    return fig
 
 # Load data with progress indicator
 with st.spinner('Loading Hall of Fame enhancers data...'):
     try:
-        peak_data, enhancer_metadata, hof_enhancers = load_data()
+        peak_data, enhancer_metadata, hof_enhancers, peak_index, peak_cell_index, hof_index, base_cell_types, top_cell_types_by_enhancer, filter_index = load_data()
         
         if hof_enhancers is not None and not hof_enhancers.empty:
-            # Calculate some quick stats for display
-            total_enhancers = len(hof_enhancers)
-            total_experiments = len([x for x in hof_enhancers['experiment'].unique() if x != '' and x != 'Not Available'])
-            total_cargos = len([x for x in hof_enhancers['cargo'].unique() if x != '' and x != 'Not Available'])
-            
             st.success("App loaded!")
         else:
             st.error("❌ No HOF enhancers found. Please check data files.")
@@ -66,19 +237,8 @@ if hof_enhancers is None or hof_enhancers.empty or peak_data is None or peak_dat
     st.error("No Hall of Fame enhancers data available. Please check data files.")
     st.stop()
 
-# Setup base data for smart filtering - using HOF enhancers for filtering
-base_enhancers = hof_enhancers['enhancer_id'].unique() if hof_enhancers is not None and not hof_enhancers.empty else []
-base_metadata = hof_enhancers.copy() if hof_enhancers is not None and not hof_enhancers.empty else pd.DataFrame()
 # Debug output removed per user request
 
-# Sort cell types numerically by their leading numbers (1-34) - exactly like main app
-import re
-def extract_cell_type_number(cell_type):
-    match = re.match(r'^(\d+)', str(cell_type))
-    return int(match.group(1)) if match else 999
-
-base_cell_types = sorted(peak_data['cell_type'].unique(), key=extract_cell_type_number) if peak_data is not None and not peak_data.empty else []
-
 # Initialize session state for filters if not exists - exactly like main app
 if 'filter_state' not in st.session_state:
     st.session_state.filter_state = {
@@ -91,49 +251,56 @@ if 'filter_state' not in st.session_state:
     }
 
 # Smart filter function - updates available options based on current selections
-def get_filtered_options(selected_filters, base_metadata):
-    """Get available options for each filter based on current selections - cell type remains independent"""
+# Cached on the selected values so reruns that only change the cell type are free
+@st.cache_data(max_entries=256, show_spinner=False)
+def get_filtered_options(filter_tuple):
+    """Get available options for each filter based on current selections - cell type remains independent
     
-    # For each filter, determine what should be available based on OTHER selected filters
-    def get_options_for_filter(exclude_filter):
-        current_metadata = base_metadata.copy()
-        
-        # Apply all filters EXCEPT the one we're calculating options for
-        for filter_name, filter_value in selected_filters.items():
-            if filter_name != exclude_filter and filter_value != "All":
-                if filter_name == 'enhancer':
-                    current_metadata = current_metadata[current_metadata['enhancer_id'] == filter_value]
-                elif filter_name == 'cargo':
-                    current_metadata = current_metadata[current_metadata['cargo'] == filter_value]
-                elif filter_name == 'experiment':
-                    current_metadata = current_metadata[current_metadata['experiment'] == filter_value]
-                elif filter_name == 'gene':
-                    current_metadata = current_metadata[current_metadata['proximal_gene'] == filter_value]
-                elif filter_name == 'gc_delivered':
-                    current_metadata = current_metadata[current_metadata['gc_delivered'] == filter_value]
-        
-        return current_metadata
+    filter_tuple holds the selected values in FILTER_COLUMNS order (enhancer, cargo, experiment, gene, gc_delivered)
+    """
+    matrix = filter_index['matrix']
+    columns = list(FILTER_COLUMNS.values())
     
-    # Get available options for each filter
-    enhancer_metadata = get_options_for_filter('enhancer')
-    available_enhancers = sorted(enhancer_metadata['enhancer_id'].unique()) if not enhancer_metadata.empty else []
+    # Matrix column and category code of every selected filter
+    selected_codes = {
+        filter_name: (position, filter_index['code_maps'][col].get(filter_value, -1))
+        for position, (filter_name, col, filter_value) in enumerate(zip(FILTER_COLUMNS, columns, filter_tuple))
+        if filter_value != "All"
+    }
     
-    cargo_metadata = get_options_for_filter('cargo')
-    available_cargos = sorted([x for x in cargo_metadata['cargo'].dropna().unique() if x != '' and x != 'Unknown']) if not cargo_metadata.empty else []
+    def rows_matching(filter_names):
+        # No selection ("All") takes every row through a view instead of building a mask
+        if not filter_names:
+            return slice(None)
+        positions, codes = zip(*(selected_codes[filter_name] for filter_name in filter_names))
+        return (matrix[:, list(positions)] == np.array(codes, dtype=matrix.dtype)).all(axis=1)
     
-    experiment_metadata = get_options_for_filter('experiment')
-    available_experiments = sorted([x for x in experiment_metadata['experiment'].dropna().unique() if x != '' and x != 'Unknown']) if not experiment_metadata.empty else []
+    all_filters_mask = rows_matching(list(selected_codes))
     
-    gene_metadata = get_options_for_filter('gene')
-    available_genes = sorted([x for x in gene_metadata['proximal_gene'].dropna().unique() if x != '' and x != 'Unknown']) if not gene_metadata.empty else []
+    # For each filter, determine what should be available based on OTHER selected filters
+    def get_options_for_filter(exclude_filter):
+        # Unselected filters all share the mask of every selected filter
+        if exclude_filter not in selected_codes:
+            return all_filters_mask
+        return rows_matching([filter_name for filter_name in selected_codes if filter_name != exclude_filter])
     
-    gc_metadata = get_options_for_filter('gc_delivered')
-    available_gc_delivered = sorted([x for x in gc_metadata['gc_delivered'].dropna().unique() if x != '' and x != 'Unknown']) if not gc_metadata.empty else []
+    def available_values(exclude_filter, col):
+        # Categories are already sorted, so unique codes map back in sorted order
+        codes = matrix[get_options_for_filter(exclude_filter), columns.index(col)]
+        values = filter_index['categories'][col][np.unique(codes[codes >= 0])]
+        return tuple(x for x in values if x != '' and x != 'Unknown')
+    
+    # Get available options for each filter
+    available_enhancers = available_values('enhancer', 'enhancer_id')
+    available_cargos = available_values('cargo', 'cargo')
+    available_experiments = available_values('experiment', 'experiment')
+    available_genes = available_values('gene', 'proximal_gene')
+    available_gc_delivered = available_values('gc_delivered', 'gc_delivered')
     
     # Cell type stays independent - always show all cell types
     available_cell_types = base_cell_types
     
-    return {
+    options = {
         'enhancers': available_enhancers,
         'cargos': available_cargos,
         'experiments': available_experiments, 
@@ -141,52 +308,68 @@ def get_filtered_options(selected_filters, base_metadata):
         'gc_delivered': available_gc_delivered,
         'cell_types': available_cell_types
     }
+    
+    # Selectbox index of every option ("All" takes index 0), cached with the options
+    options['positions'] = {
+        key: {option: i for i, option in enumerate(values, 1)}
+        for key, values in options.items()
+    }
+    
+    # Enhancers of the rows matching every selected filter, in table order, resolved from their codes
+    enhancer_codes = pd.unique(matrix[all_filters_mask, columns.index('enhancer_id')])
+    options['enhancer_ids'] = tuple(filter_index['categories']['enhancer_id'][enhancer_codes[enhancer_codes >= 0]])
+    
+    return options
+
+def option_index(value, positions):
+    """Selectbox index of the current selection - 0 ("All") when it is no longer available"""
+    return positions.get(value, 0)
 
 # Get current filter options with smart cascading
-current_options = get_filtered_options(st.session_state.filter_state, base_metadata)
+current_options = get_filtered_options(tuple(st.session_state.filter_state[name] for name in FILTER_COLUMNS))
 
 # Debug output removed per user request
 
 # Sidebar filter controls exactly like main app
 selected_enhancer = st.sidebar.selectbox(
     "Select Enhancer",
-    options=["All"] + current_options['enhancers'],
-    index=0 if st.session_state.filter_state['enhancer'] == 'All' or st.session_state.filter_state['enhancer'] not in current_options['enhancers'] else current_options['enhancers'].index(st.session_state.filter_state['enhancer']) + 1,
+    options=["All", *current_options['enhancers']],
+    index=option_index(st.session_state.filter_state['enhancer'], current_options['positions']['enhancers']),
     help="Choose a specific enhancer to analyze"
 )
 
 selected_cargo = st.sidebar.selectbox(
     "Filter by Cargo",
-    options=["All"] + current_options['cargos'],
-    index=0 if st.session_state.filter_state['cargo'] == 'All' or st.session_state.filter_state['cargo'] not in current_options['cargos'] else current_options['cargos'].index(st.session_state.filter_state['cargo']) + 1,
+    options=["All", *current_options['cargos']],
+    index=option_index(st.session_state.filter_state['cargo'], current_options['positions']['cargos']),
     help="Filter by experimental cargo type"
 )
 
 selected_experiment = st.sidebar.selectbox(
     "Filter by Experiment", 
-    options=["All"] + current_options['experiments'],
-    index=0 if st.session_state.filter_state['experiment'] == 'All' or st.session_state.filter_state['experiment'] not in current_options['experiments'] else current_options['experiments'].index(st.session_state.filter_state['experiment']) + 1,
+    options=["All", *current_options['experiments']],
+    index=option_index(st.session_state.filter_state['experiment'], current_options['positions']['experiments']),
     help="Filter by experiment identifier"
 )
 
 selected_gene = st.sidebar.selectbox(
     "Filter by Proximal Gene",
-    options=["All"] + current_options['genes'],
-    index=0 if st.session_state.filter_state['gene'] == 'All' or st.session_state.filter_state['gene'] not in current_options['genes'] else current_options['genes'].index(st.session_state.filter_state['gene']) + 1,
+    options=["All", *current_options['genes']],
+    index=option_index(st.session_state.filter_state['gene'], current_options['positions']['genes']),
     help="Filter by nearest gene"
 )
 
 selected_gc_delivered = st.sidebar.selectbox(
     "Filter by GC Delivered",
-    options=["All"] + current_options['gc_delivered'],
-    index=0 if st.session_state.filter_state['gc_delivered'] == 'All' or st.session_state.filter_state['gc_delivered'] not in current_options['gc_delivered'] else current_options['gc_delivered'].index(st.session_state.filter_state['gc_delivered']) + 1,
+    options=["All", *current_options['gc_delivered']],
+    index=option_index(st.session_state.filter_state['gc_delivered'], current_options['positions']['gc_delivered']),
     help="Filter by genome copies delivered"
 )
 
 selected_cell_type = st.sidebar.selectbox(
     "Filter by Cell Type",
-    options=["All"] + current_options['cell_types'],
-    index=0 if st.session_state.filter_state['cell_type'] == 'All' or st.session_state.filter_state['cell_type'] not in current_options['cell_types'] else current_options['cell_types'].index(st.session_state.filter_state['cell_type']) + 1,
+    options=["All", *current_options['cell_types']],
+    index=option_index(st.session_state.filter_state['cell_type'], current_options['positions']['cell_types']),
     help="Focus on specific cell type for visualization"
 )
 
@@ -200,87 +383,44 @@ st.session_state.filter_state = {
     'cell_type': selected_cell_type
 }
 
-# Apply filters to get final filtered data
-filtered_metadata = base_metadata.copy()
-if selected_enhancer != "All":
-    filtered_metadata = filtered_metadata[filtered_metadata['enhancer_id'] == selected_enhancer]
-if selected_cargo != "All":
-    filtered_metadata = filtered_metadata[filtered_metadata['cargo'] == selected_cargo]
-if selected_experiment != "All":
-    filtered_metadata = filtered_metadata[filtered_metadata['experiment'] == selected_experiment]
-if selected_gene != "All":
-    filtered_metadata = filtered_metadata[filtered_metadata['proximal_gene'] == selected_gene]
-if selected_gc_delivered != "All":
-    filtered_metadata = filtered_metadata[filtered_metadata['gc_delivered'] == selected_gc_delivered]
+# Apply filters to get final filtered data - reuses the cached mask for the new selections,
+# which also warms the cache for the options shown on the next rerun
+selected_options = get_filtered_options((
+    selected_enhancer,
+    selected_cargo,
+    selected_experiment,
+    selected_gene,
+    selected_gc_delivered
+))
 
 # Get the filtered enhancer list
-filtered_enhancer_ids = filtered_metadata['enhancer_id'].unique() if not filtered_metadata.empty else []
-filtered_hof_enhancers = hof_enhancers[hof_enhancers['enhancer_id'].isin(filtered_enhancer_ids)]
+filtered_enhancer_ids = selected_options['enhancer_ids']
 
-# Filter peak data
-filtered_peak_data = peak_data[peak_data['enhancer_id'].isin(filtered_enhancer_ids)]
-if selected_cell_type != "All":
-    filtered_peak_data = filtered_peak_data[filtered_peak_data['cell_type'] == selected_cell_type]
 
 # Remove debug output per user request
 
-# Individual enhancer analysis
-if len(filtered_enhancer_ids) > 0:
-    st.markdown('### 🧬 Individual Enhancer Analysis')
-    
+# The enhancer picker and its panels rerun on their own when another enhancer is picked,
+# leaving the sidebar filters untouched
+@st.fragment
+def render_enhancer_analysis(enhancer_ids, selected_cell_type):
+    """Imaging and peak accessibility panels for the enhancer picked from the filtered list"""
     # Select specific enhancer for detailed analysis
-    if len(filtered_enhancer_ids) == 1:
-        enhancer_id = filtered_enhancer_ids[0]
+    if len(enhancer_ids) == 1:
+        enhancer_id = enhancer_ids[0]
         st.info(f'Analyzing enhancer: **{enhancer_id}**')
     else:
         enhancer_id = st.selectbox(
             'Select enhancer for detailed analysis:',
-            options=filtered_enhancer_ids,
+            options=enhancer_ids,
             key='enhancer_selector'
         )
     
     if enhancer_id:
         # Get enhancer data
-        enhancer_data = filtered_hof_enhancers[filtered_hof_enhancers['enhancer_id'] == enhancer_id].iloc[0]
-        
-        # Extract imaging information
-        image_link = enhancer_data.get('image_link', '')
-        neuroglancer_1 = enhancer_data.get('neuroglancer_1', '')
-        neuroglancer_3 = enhancer_data.get('neuroglancer_3', '')
-        viewer_link = enhancer_data.get('viewer_link', '')
-        coronal_mip = enhancer_data.get('coronal_mip', '')
-        sagittal_mip = enhancer_data.get('sagittal_mip', '')
+        enhancer_data = hof_enhancers.iloc[hof_index[enhancer_id][0]]
         
-        # Create imaging URLs list
-        imaging_urls = []
-        
-        # Handle image_link based on experiment type and content
-        if image_link and image_link.startswith('http'):
-            url_parts = [url.strip() for url in image_link.split(',')]
-            for url in url_parts:
-                if url.startswith('http'):
-                    if 'contact_sheets' in url.lower():
-                        imaging_urls.append(('Contact Sheet', url))
-                    elif 'neuroglancer' in url.lower():
-                        imaging_urls.append(('Neuroglancer (Primary)', url))
-                    else:
-                        imaging_urls.append(('Image Viewer', url))
-        
-        # Add dedicated neuroglancer viewers
-        if neuroglancer_1 and neuroglancer_1.startswith('http'):
-            imaging_urls.append(('Neuroglancer 1', neuroglancer_1))
-        if neuroglancer_3 and neuroglancer_3.startswith('http'):
-            imaging_urls.append(('Neuroglancer 3', neuroglancer_3))
-        
-        # Add viewer link
-        if viewer_link and viewer_link.startswith('http'):
-            imaging_urls.append(('Viewer', viewer_link))
-        
-        # Add MIP projections (exclude 'FALSE' values)
-        if coronal_mip and coronal_mip.startswith('http') and coronal_mip.upper() != 'FALSE':
-            imaging_urls.append(('Coronal MIP', coronal_mip))
-        if sagittal_mip and sagittal_mip.startswith('http') and sagittal_mip.upper() != 'FALSE':
-            imaging_urls.append(('Sagittal MIP', sagittal_mip))
+        # Imaging viewers were classified and ordered once at load time
+        imaging_urls = enhancer_data['imaging_urls']
         
         # Create main layout with imaging on left and chart on right
         col_left, col_right = st.columns([2, 1])  # 2:1 ratio for imaging:chart
@@ -290,26 +430,8 @@ if len(filtered_enhancer_ids) > 0:
             st.markdown('**🖼️ Imaging Visualization**')
             
             if imaging_urls:
-                # Separate different viewer types
-                contact_sheets = [(title, url) for title, url in imaging_urls if 'contact' in title.lower() and 'sheet' in title.lower()]
-                neuroglancer_viewers = [(title, url) for title, url in imaging_urls if 'neuroglancer' in title.lower()]
-                mip_viewers = [(title, url) for title, url in imaging_urls if 'mip' in title.lower()]
-                other_viewers = [(title, url) for title, url in imaging_urls if title not in [t for t, _ in contact_sheets + neuroglancer_viewers + mip_viewers]]
-                
-                # Prioritize based on experiment type
-                current_experiment = str(enhancer_data['experiment']).lower()
-                if 'lightsheet' in current_experiment:
-                    primary_viewers = neuroglancer_viewers + mip_viewers
-                    secondary_viewers = contact_sheets + other_viewers
-                elif 'epi' in current_experiment:
-                    primary_viewers = contact_sheets + neuroglancer_viewers
-                    secondary_viewers = mip_viewers + other_viewers
-                else:
-                    # Default for STPT, SSv4, etc.
-                    primary_viewers = neuroglancer_viewers + contact_sheets
-                    secondary_viewers = mip_viewers + other_viewers
-                
-                all_viewers = primary_viewers + secondary_viewers
+                # Viewers were put in priority order for the experiment type at load time
+                all_viewers = imaging_urls
                 
                 if len(all_viewers) > 1:
                     # Use tabs to overlay multiple viewers - exactly like main app
@@ -318,19 +440,11 @@ if len(filtered_enhancer_ids) > 0:
                     
                     for tab, (title, url) in zip(tabs, all_viewers):
                         with tab:
-                            st.markdown(
-                                f'<iframe src="{url}" width="100%" height="700" frameborder="0" '
-                                f'style="border: 1px solid #ccc; border-radius: 4px;"></iframe>', 
-                                unsafe_allow_html=True
-                            )
+                            render_viewer(url)
                 else:
                     # Single viewer - display directly
                     title, url = all_viewers[0]
-                    st.markdown(
-                        f'<iframe src="{url}" width="100%" height="700" frameborder="0" '
-                        f'style="border: 1px solid #ccc; border-radius: 4px;"></iframe>', 
-                        unsafe_allow_html=True
-                    )
+                    render_viewer(url)
             else:
                 st.info('No imaging visualizations available for this enhancer')
         
@@ -338,36 +452,32 @@ if len(filtered_enhancer_ids) > 0:
             # Accessibility chart
             st.markdown('**📈 Peak Accessibility**')
             
-            # Filter peak data for this enhancer
-            enhancer_peak_data = filtered_peak_data[filtered_peak_data['enhancer_id'] == enhancer_id].copy()
-            
+            # Peak rows for this enhancer (and cell type), gathered straight from the load-time indices
             if selected_cell_type != 'All':
-                enhancer_peak_data = enhancer_peak_data[enhancer_peak_data['cell_type'] == selected_cell_type]
+                enhancer_peak_data = peak_data.take(peak_cell_index.get((enhancer_id, selected_cell_type), []))
                 st.info(f'Showing data filtered for cell type: **{selected_cell_type}**')
+            else:
+                enhancer_peak_data = peak_data.take(peak_index.get(enhancer_id, []))
             
             if not enhancer_peak_data.empty:
                 try:
                     # Generate pyGenomeTracks-style visualization
-                    viz_generator = VisualizationGenerator()
-                    fig = viz_generator.create_peak_visualization(enhancer_peak_data, enhancer_id)
-                    # Make visualization taller for enhanced track visibility
-                    fig.update_layout(height=2000)
-                    st.plotly_chart(fig, use_container_width=True)
+                    fig = build_peak_figure(enhancer_id, selected_cell_type, enhancer_peak_data)
+                    st.plotly_chart(fig, width='stretch', config={'displaylogo': False})
                     
                     # Compact statistics
                     cell_types_count = enhancer_peak_data['cell_type'].nunique()
-                    max_accessibility = enhancer_peak_data['accessibility_score'].max()
-                    mean_accessibility = enhancer_peak_data['accessibility_score'].mean()
-                    std_accessibility = enhancer_peak_data['accessibility_score'].std()
+                    # Reduce the scores as a plain NumPy array, skipping pandas' per-call NaN handling; ddof=1 keeps pandas' sample std
+                    scores = enhancer_peak_data['accessibility_score'].to_numpy()
+                    max_accessibility = scores.max()
+                    mean_accessibility = scores.mean()
+                    std_accessibility = scores.std(ddof=1)
                     
                     st.markdown(f'**📊 {cell_types_count} cells • Max: {max_accessibility:.4f} • Mean: {mean_accessibility:.4f} • Std: {std_accessibility:.4f}**')
                     
                     # Top cell types
                     if cell_types_count > 1:
-                        top_cell_types = (enhancer_peak_data.groupby('cell_type')['accessibility_score']
-                                        .mean()
-                                        .sort_values(ascending=False)
-                                        .head(5))
+                        top_cell_types = top_cell_types_by_enhancer.loc[enhancer_id]
                         
                         top_list = ' • '.join([f'{ct}: {score:.4f}' for ct, score in top_cell_types.items()])
                         st.markdown(f'**Top:** {top_list}')
@@ -380,11 +490,16 @@ if len(filtered_enhancer_ids) > 0:
                     display_cols = ['cell_type', 'position_index', 'accessibility_score']
                     available_cols = [col for col in display_cols if col in enhancer_peak_data.columns]
                     st.dataframe(
-                        enhancer_peak_data[available_cols].head(20),
-                        use_container_width=True
+                        arrow_display(enhancer_peak_data[available_cols].head(20)),
+                        width='stretch'
                     )
             else:
                 st.warning('⚠️ No peak accessibility data available for this enhancer with current filters')
+
+# Individual enhancer analysis
+if len(filtered_enhancer_ids) > 0:
+    st.markdown('### 🧬 Individual Enhancer Analysis')
+    render_enhancer_analysis(filtered_enhancer_ids, selected_cell_type)
 else:
     st.warning('Selected enhancer not found in filtered results')
 
@@ -3,11 +3,127 @@ Data Processor for GitHub Deployment with Chunked CSV Files
 Handles loading and combining chunked CSV files automatically
 """
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+import hashlib
 import os
-import glob
+import re
+import shutil
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+# Copy-on-Write lets renames, column selections and take() share buffers instead of copying;
+# it is always on from pandas 3, where setting the option is deprecated
+if int(pd.__version__.split('.')[0]) < 3:
+    pd.options.mode.copy_on_write = True
+
+# Directory (next to this module) holding the peak data as a partitioned Parquet dataset
+PEAK_DATASET_DIR = "peak_data"
+
+# Peak columns the app reads (after the rename); only these are decoded from the Parquet dataset
+PEAK_DATASET_COLUMNS = ['enhancer_id', 'cell_type', 'chr', 'start', 'end', 'position_index', 'accessibility_score']
+
+# Names of the chunked peak CSV files (part1 to part4)
+CHUNK_FILE_PATTERN = re.compile(r'^part[1-4].*chunk.*\.csv$')
+
+# CSV column names mapped to the names used throughout the app
+PEAK_COLUMN_RENAMES = {
+    'enhancer_start': 'start',
+    'enhancer_end': 'end',
+    'signal_value': 'accessibility_score',
+    'genomic_position': 'position_index'
+}
+
+# Columns that identify one peak measurement (after the rename); duplicates are detected on these only
+PEAK_KEY_COLUMNS = ['enhancer_id', 'chr', 'start', 'end', 'cell_type', 'position_index']
+
+# Low-cardinality string columns of the CSV chunks, parsed straight into dictionary (categorical) columns
+CSV_CATEGORY_COLUMNS = ['cell_type', 'enhancer_id', 'chr', 'region_type']
+
+# 32-bit types for the numeric CSV columns (original names), matching PEAK_DTYPES after the rename;
+# the Arrow reader rejects any value that does not fit instead of wrapping it
+CSV_NUMERIC_TYPES = {
+    'genomic_position': pa.int32(),
+    'signal_value': pa.float32(),
+    'distance_from_enhancer': pa.int32(),
+    'enhancer_start': pa.uint32(),
+    'enhancer_end': pa.uint32(),
+    'extended_start': pa.uint32(),
+    'extended_end': pa.uint32()
+}
+
+# Metadata columns read downstream (original Feather names); the rest of the file is never decoded
+METADATA_COLUMNS = [
+    'Enhancer_ID', 'Cargo', 'Experiment_Type', 'Proximal_Gene', 'GC delivered',
+    'Image_link', 'Neuroglancer 1', 'Neuroglancer 3', 'Viewer Link', 'Coronal_MIP', 'Sagittal_MIP',
+    'Genotype', 'Target_Cell_Population', 'Plasmid_ID', 'chr', 'start', 'end'
+]
+
+# Metadata values given to peak-data enhancers that have no metadata record
+PLACEHOLDER_METADATA = {
+    'cargo': 'Unknown',
+    'experiment': 'Unknown',
+    'proximal_gene': 'Unknown',
+    'gc_delivered': 'Unknown',
+    'image_link': '',
+    'neuroglancer_1': '',
+    'neuroglancer_3': '',
+    'viewer_link': '',
+    'coronal_mip': '',
+    'sagittal_mip': ''
+}
+
+# HOF record fields taken from an enhancer's primary metadata record: field -> (metadata column, default if absent)
+HOF_METADATA_FIELDS = {
+    # Core metadata fields from feather file
+    'cargo': ('cargo', 'Unknown'),
+    'experiment': ('experiment', 'Unknown'),
+    'proximal_gene': ('proximal_gene', 'Unknown'),
+    'gc_delivered': ('gc_delivered', 'Unknown'),
+    
+    # Imaging metadata
+    'image_link': ('image_link', ''),
+    'neuroglancer_1': ('neuroglancer_1', ''),
+    'neuroglancer_3': ('neuroglancer_3', ''),
+    'viewer_link': ('viewer_link', ''),
+    'coronal_mip': ('coronal_mip', ''),
+    'sagittal_mip': ('sagittal_mip', ''),
+    
+    # Additional fields
+    'genotype': ('Genotype', ''),
+    'target_cell_population': ('Target_Cell_Population', ''),
+    'plasmid_id': ('Plasmid_ID', '')
+}
+
+# Uncompressed Arrow IPC copy of the combined CSV chunks, memory-mapped on later starts
+PEAK_CACHE_FILE = "peak_data_cache.arrow"
+
+# Compact dtypes for the peak table: 32-bit numerics and categorical strings
+PEAK_DTYPES = {
+    'accessibility_score': np.float32,
+    'position_index': np.int32,
+    'start': np.uint32,
+    'end': np.uint32,
+    'extended_start': np.uint32,
+    'extended_end': np.uint32,
+    'distance_from_enhancer': np.int32,
+    'chr': 'category',
+    'region_type': 'category',
+    'cell_type': 'category',
+    'enhancer_id': 'category'
+}
+
+# Marker kept in the peak cache's schema metadata. The cache holds processed rows, so bump the version when
+# load_peak_chunks changes; edits to the constants it reads change the fingerprint on their own
+PEAK_CACHE_FORMAT = "1-" + hashlib.sha1(repr((
+    PEAK_COLUMN_RENAMES, PEAK_KEY_COLUMNS, CSV_CATEGORY_COLUMNS, CSV_NUMERIC_TYPES, PEAK_DTYPES
+)).encode()).hexdigest()
+
 class DataProcessor:
     """Process and load genomic data from chunked CSV files and metadata"""
     
@@ -15,19 +131,26 @@ class DataProcessor:
         # Get absolute path to current directory for Posit Cloud compatibility
         self.base_path = os.path.dirname(os.path.abspath(__file__))
         self.data_dir = self.base_path  # Use absolute path for all operations
+        # Verbose load logging (file listings, per-chunk counts, sample values) only with DATAPROC_DEBUG=1
+        self.debug = os.environ.get("DATAPROC_DEBUG") == "1"
         print(f"DataProcessor initialized with base_path: {self.base_path}")
-        print(f"Available files: {[f for f in os.listdir(self.base_path) if f.endswith(('.csv', '.feather'))][:5]}...")
+        if self.debug:
+            print(f"Available files: {[f for f in os.listdir(self.base_path) if f.endswith(('.csv', '.feather'))][:5]}...")
         
     def load_all_data(self):
         """Load and process all data files including chunked CSV files"""
-        # Load peak data from chunked files
-        peak_data = self.load_peak_data()
+        # Load peak data and enhancer metadata concurrently - independent files, parsed in GIL-releasing Arrow code
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            peak_future = executor.submit(self.load_peak_data)
+            metadata_future = executor.submit(self.load_metadata)
+            peak_data = peak_future.result()
+            enhancer_metadata = metadata_future.result()
         
         if peak_data is None or peak_data.empty:
             return None, None, None
         
-        # Load enhancer metadata
-        enhancer_metadata = self.load_metadata()
+        # Downcast the largest table once so every later filter, groupby and plot moves half the bytes
+        peak_data = peak_data.astype({col: dtype for col, dtype in PEAK_DTYPES.items() if col in peak_data.columns})
         
         # Extract Hall of Fame enhancers
         hof_enhancers = self.extract_hof_enhancers(enhancer_metadata, peak_data)
@@ -50,33 +173,130 @@ class DataProcessor:
         return peak_data, enhancer_metadata, hof_enhancers
     
     def load_peak_data(self):
+        """Load peak data from the Parquet dataset if it exists, otherwise from the IPC cache or the chunked CSV files"""
+        dataset_path = os.path.join(self.data_dir, PEAK_DATASET_DIR)
+        if os.path.isdir(dataset_path):
+            if not self.is_older_than_chunks(dataset_path):
+                return self.load_peak_dataset()
+            print(f"Parquet dataset is older than the CSV chunks, falling back to them: {dataset_path}")
+        
+        peak_data = self.load_peak_cache()
+        if peak_data is None:
+            peak_data = self.load_peak_chunks()
+            if peak_data is not None and not peak_data.empty:
+                self.write_peak_cache(peak_data)
+        return peak_data
+    
+    def load_peak_cache(self):
+        """Memory-map the IPC cache of the CSV chunks, or return None if it is missing, older than any chunk or in another format"""
+        cache_path = os.path.join(self.data_dir, PEAK_CACHE_FILE)
+        if not os.path.exists(cache_path):
+            return None
+        if self.is_older_than_chunks(cache_path):
+            print(f"Peak cache is older than the CSV chunks, rebuilding: {cache_path}")
+            return None
+        try:
+            with pa.memory_map(cache_path) as source:
+                reader = pa.ipc.open_file(source)
+                cache_format = (reader.schema.metadata or {}).get(b'peak_cache_format', b'').decode()
+                if cache_format != PEAK_CACHE_FORMAT:
+                    print(f"Peak cache was written in another format, rebuilding: {cache_path}")
+                    return None
+                peak_data = reader.read_all().to_pandas(split_blocks=True, self_destruct=True)
+            print(f"Loaded {len(peak_data):,} rows from peak cache: {cache_path}")
+            return peak_data
+        except Exception as e:
+            print(f"Error loading peak cache: {str(e)}")
+            return None
+    
+    def is_older_than_chunks(self, path):
+        """Check whether any CSV chunk was modified after the file, or after the oldest file under the directory"""
+        if os.path.isdir(path):
+            mtimes = [os.path.getmtime(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names]
+            if not mtimes:
+                return True
+            built_at = min(mtimes)
+        else:
+            built_at = os.path.getmtime(path)
+        return any(os.path.getmtime(chunk_file) > built_at for chunk_file in self.find_chunk_files())
+    
+    def write_peak_cache(self, peak_data):
+        """Write the combined CSV chunks to the IPC cache; a read-only deployment just skips it"""
+        cache_path = os.path.join(self.data_dir, PEAK_CACHE_FILE)
+        try:
+            table = pa.Table.from_pandas(peak_data)
+            table = table.replace_schema_metadata({**table.schema.metadata, b'peak_cache_format': PEAK_CACHE_FORMAT.encode()})
+            feather.write_feather(table, cache_path, compression='uncompressed')
+            print(f"Wrote peak cache: {cache_path}")
+        except Exception as e:
+            print(f"Could not write peak cache: {str(e)}")
+    
+    def load_peak_dataset(self):
+        """Load the columns the app uses from the Parquet dataset written by convert_chunks_to_parquet"""
+        dataset_path = os.path.join(self.data_dir, PEAK_DATASET_DIR)
+        print(f"Loading peak data from Parquet dataset: {dataset_path}")
+        try:
+            peak_data = pd.read_parquet(dataset_path, engine='pyarrow', columns=PEAK_DATASET_COLUMNS)
+            print(f"Loaded {len(peak_data):,} rows from Parquet dataset")
+            return peak_data
+        except Exception as e:
+            print(f"Error loading peak dataset: {str(e)}")
+            return None
+    
+    def convert_chunks_to_parquet(self):
+        """One-time conversion of the chunked CSV files into a Parquet dataset partitioned by cell type"""
+        peak_data = self.load_peak_chunks()
+        if peak_data is None or peak_data.empty:
+            print("No peak data to convert")
+            return None
+        
+        # Sort by enhancer so the repeated id and position columns compress into long runs
+        table = pa.Table.from_pandas(peak_data.sort_values(['enhancer_id', 'position_index']), preserve_index=False)
+        dataset_path = os.path.join(self.data_dir, PEAK_DATASET_DIR)
+        
+        # Replace any earlier dataset - the writer uses unique file names, so rerunning would add a second copy
+        if os.path.isdir(dataset_path):
+            shutil.rmtree(dataset_path)
+        pq.write_to_dataset(
+            table,
+            root_path=dataset_path,
+            partition_cols=['cell_type'],
+            compression='zstd',
+            row_group_size=100_000
+        )
+        print(f"Wrote {table.num_rows:,} rows to {dataset_path}")
+        return dataset_path
+    
+    def read_peak_chunk(self, chunk_file):
+        """Parse one CSV chunk into an Arrow table with 32-bit numbers and dictionary-encoded repeated strings"""
+        column_types = {col: pa.dictionary(pa.int32(), pa.string()) for col in CSV_CATEGORY_COLUMNS}
+        column_types.update(CSV_NUMERIC_TYPES)
+        return pacsv.read_csv(chunk_file, convert_options=pacsv.ConvertOptions(column_types=column_types))
+    
+    def find_chunk_files(self):
+        """Chunk CSV files in the data directory, part1 to part4, found in a single directory scan"""
+        with os.scandir(self.data_dir) as entries:
+            return sorted(entry.path for entry in entries if entry.is_file() and CHUNK_FILE_PATTERN.match(entry.name))
+    
+    def load_peak_chunks(self):
         """Load and combine chunked CSV files"""
         print(f"Loading peak data from directory: {self.data_dir}")
         try:
-            # Pattern to match all chunk files in current directory
-            chunk_patterns = [
-                "part1*chunk*.csv",
-                "part2*chunk*.csv", 
-                "part3*chunk*.csv",
-                "part4*chunk*.csv"
-            ]
+            chunk_files = self.find_chunk_files()
+            if self.debug:
+                print(f"Found {len(chunk_files)} chunk files")
             
-            all_chunks = []
-            for pattern in chunk_patterns:
-                search_pattern = os.path.join(self.data_dir, pattern)
-                chunk_files = glob.glob(search_pattern)
-                chunk_files.sort()  # Ensure proper order
-                print(f"Pattern {pattern}: found {len(chunk_files)} files")
-                
-                if chunk_files:
-                    print(f"Loading {len(chunk_files)} chunks for pattern {pattern}")
-                    
-                    for chunk_file in chunk_files:
-                        df = pd.read_csv(chunk_file)
-                        all_chunks.append(df)
-                        print(f"  Loaded {os.path.basename(chunk_file)}: {len(df):,} rows")
+            chunk_tables = []
+            if chunk_files:
+                # Parse the chunks in parallel with the block-parallel Arrow CSV reader; map keeps file order
+                print(f"Loading {len(chunk_files)} chunks")
+                with ThreadPoolExecutor(max_workers=min(len(chunk_files), os.cpu_count() or 1)) as executor:
+                    chunk_tables = list(executor.map(self.read_peak_chunk, chunk_files))
+                if self.debug:
+                    for chunk_file, table in zip(chunk_files, chunk_tables):
+                        print(f"  Loaded {os.path.basename(chunk_file)}: {table.num_rows:,} rows")
             
-            if not all_chunks:
+            if not chunk_tables:
                 print("No chunk files found in current directory")
                 print("Expected files: part1*chunk*.csv, part2*chunk*.csv, part3*chunk*.csv, part4*chunk*.csv")
                 print("Current directory contents:")
@@ -85,25 +305,27 @@ class DataProcessor:
                         print(f"  {file}")
                 return None
             
-            # Combine all chunks
-            combined_df = pd.concat(all_chunks, ignore_index=True)
-            print(f"Combined all chunks: {len(combined_df):,} total rows")
+            # Combine all chunks as Arrow tables, rename columns to match expected names (metadata only),
+            # and convert once into unconsolidated per-column blocks, releasing the Arrow buffers as columns convert
+            combined_table = pa.concat_tables(chunk_tables)
+            del chunk_tables
+            combined_table = combined_table.rename_columns([PEAK_COLUMN_RENAMES.get(name, name) for name in combined_table.column_names])
+            combined_df = combined_table.to_pandas(split_blocks=True, self_destruct=True)
+            del combined_table
             
-            # CRITICAL FIX: Rename columns to match expected names
-            if 'enhancer_start' in combined_df.columns:
-                combined_df = combined_df.rename(columns={
-                    'enhancer_start': 'start',
-                    'enhancer_end': 'end',
-                    'signal_value': 'accessibility_score',
-                    'genomic_position': 'position_index'
-                })
-                print("Renamed columns: enhancer_start->start, enhancer_end->end, signal_value->accessibility_score")
+            # Dictionary columns arrive as categoricals in first-seen order; sort them like astype('category') would
+            for col in CSV_CATEGORY_COLUMNS:
+                if col in combined_df.columns:
+                    combined_df[col] = combined_df[col].cat.reorder_categories(combined_df[col].cat.categories.sort_values())
+            print(f"Combined all chunks: {len(combined_df):,} total rows")
             
-            # Remove any duplicate rows
-            original_length = len(combined_df)
-            combined_df = combined_df.drop_duplicates()
-            if len(combined_df) < original_length:
-                print(f"Removed {original_length - len(combined_df):,} duplicate rows")
+            # Remove any duplicate rows, hashing only the columns that identify a measurement;
+            # the frame is only copied when there is something to drop
+            key_columns = [col for col in PEAK_KEY_COLUMNS if col in combined_df.columns]
+            duplicated = combined_df.duplicated(subset=key_columns or None).to_numpy()
+            if duplicated.any():
+                combined_df = combined_df[~duplicated].reset_index(drop=True)
+                print(f"Removed {int(duplicated.sum()):,} duplicate rows")
             
             return combined_df
             
@@ -116,10 +338,20 @@ class DataProcessor:
         try:
             # Use absolute path for Posit Cloud compatibility
             metadata_path = os.path.join(self.base_path, "Enhancer_and_experiment_metadata_1751929479549.feather")
-            print(f"Looking for metadata at: {metadata_path}")
-            print(f"File exists: {os.path.exists(metadata_path)}")
+            if self.debug:
+                print(f"Looking for metadata at: {metadata_path}")
             if os.path.exists(metadata_path):
-                metadata = pd.read_feather(metadata_path)
+                # Memory-map the Arrow file and keep only the columns used downstream, as Arrow-backed columns
+                with pa.memory_map(metadata_path) as source:
+                    try:
+                        reader = pa.ipc.open_file(source)
+                        columns = [col for col in METADATA_COLUMNS if col in reader.schema.names]
+                        table = reader.read_all().select(columns)
+                    except pa.ArrowInvalid:
+                        # Feather V1 files are not Arrow IPC files; the Feather reader still handles them
+                        table = feather.read_table(metadata_path)
+                        table = table.select([col for col in METADATA_COLUMNS if col in table.column_names])
+                    metadata = table.to_pandas(types_mapper=pd.ArrowDtype)
                 print(f"Loaded metadata: {len(metadata)} records")
                 
                 # Fix column names to match expected format
@@ -141,14 +373,15 @@ class DataProcessor:
                 existing_columns = {old_col: new_col for old_col, new_col in column_mapping.items() if old_col in metadata.columns}
                 metadata = metadata.rename(columns=existing_columns)
                 
-                print(f"Renamed columns: {existing_columns}")
-                print(f"Enhanced metadata columns: {list(metadata.columns)}")
-                
-                # Show sample data to debug
-                print("Sample metadata rows:")
-                for col in ['enhancer_id', 'cargo', 'experiment', 'proximal_gene', 'gc_delivered']:
-                    if col in metadata.columns:
-                        print(f"{col}: {metadata[col].dropna().unique()[:3]}")
+                if self.debug:
+                    print(f"Renamed columns: {existing_columns}")
+                    print(f"Enhanced metadata columns: {list(metadata.columns)}")
+                    
+                    # Show sample data to debug
+                    print("Sample metadata rows:")
+                    for col in ['enhancer_id', 'cargo', 'experiment', 'proximal_gene', 'gc_delivered']:
+                        if col in metadata.columns:
+                            print(f"{col}: {metadata[col].dropna().unique()[:3]}")
                 
                 return metadata
             else:
@@ -173,16 +406,24 @@ class DataProcessor:
             return pd.DataFrame()
         
         # CRITICAL FIX: Get unique enhancer IDs from peak data (these are our Hall of Fame enhancers)
-        hof_enhancer_ids = peak_data['enhancer_id'].unique()
-        print(f"Found {len(hof_enhancer_ids)} unique Hall of Fame enhancers from peak data: {hof_enhancer_ids[:5]}...")
+        # A categorical enhancer_id (as load_all_data produces) already lists them, with no pass over the rows
+        if isinstance(peak_data['enhancer_id'].dtype, pd.CategoricalDtype):
+            hof_enhancer_ids = peak_data['enhancer_id'].cat.categories.to_numpy()
+        else:
+            hof_enhancer_ids = np.asarray(peak_data['enhancer_id'].unique())
+        print(f"Found {len(hof_enhancer_ids)} unique Hall of Fame enhancers from peak data")
+        if self.debug:
+            print(f"First Hall of Fame enhancers: {hof_enhancer_ids[:5]}...")
         
         # If we have metadata, merge it using original column names
         if metadata_df is not None and not metadata_df.empty:
             # Check for Enhancer_ID (original) or enhancer_id (renamed)
             enhancer_col = 'Enhancer_ID' if 'Enhancer_ID' in metadata_df.columns else 'enhancer_id'
             if enhancer_col in metadata_df.columns:
-                # Filter metadata for HOF enhancers using original column name
-                hof_metadata = metadata_df[metadata_df[enhancer_col].isin(hof_enhancer_ids)].copy()
+                # Filter metadata for HOF enhancers using original column name, matched on the Arrow column
+                enhancer_values = pa.array(metadata_df[enhancer_col])
+                is_hof = pc.is_in(enhancer_values, value_set=pa.array(hof_enhancer_ids, type=enhancer_values.type))
+                hof_metadata = metadata_df[is_hof.to_numpy(zero_copy_only=False)].copy()
                 
                 # Rename the enhancer column to standard name for consistency
                 if enhancer_col != 'enhancer_id':
@@ -206,101 +447,60 @@ class DataProcessor:
                 existing_columns = {old_col: new_col for old_col, new_col in column_mapping.items() if old_col in hof_metadata.columns}
                 if existing_columns:
                     hof_metadata = hof_metadata.rename(columns=existing_columns)
-                    print(f"Mapped columns: {existing_columns}")
+                    if self.debug:
+                        print(f"Mapped columns: {existing_columns}")
             else:
                 hof_metadata = pd.DataFrame()
             
             # Ensure all HOF enhancers are represented
             existing_enhancer_ids = set(hof_metadata['enhancer_id']) if not hof_metadata.empty else set()
-            missing_enhancers = set(hof_enhancer_ids) - existing_enhancer_ids
+            missing_enhancers = [enhancer_id for enhancer_id in hof_enhancer_ids if enhancer_id not in existing_enhancer_ids]
             
             if missing_enhancers:
-                # Create placeholder entries for missing enhancers
-                missing_data = []
-                for enhancer_id in missing_enhancers:
-                    # Get basic info from peak data
-                    enhancer_peaks = peak_data[peak_data['enhancer_id'] == enhancer_id]
-                    cell_types = enhancer_peaks['cell_type'].unique()
-                    
-                    missing_data.append({
-                        'enhancer_id': enhancer_id,
-                        'chr': enhancer_peaks['chr'].iloc[0] if not enhancer_peaks.empty else '',
-                        'start': enhancer_peaks['start'].iloc[0] if 'start' in enhancer_peaks.columns and not enhancer_peaks.empty else 0,
-                        'end': enhancer_peaks['end'].iloc[0] if 'end' in enhancer_peaks.columns and not enhancer_peaks.empty else 0,
-                        'cargo': 'Unknown',
-                        'experiment': 'Unknown',
-                        'proximal_gene': 'Unknown',
-                        'gc_delivered': 'Unknown',
-                        'image_link': '',
-                        'neuroglancer_1': '',
-                        'neuroglancer_3': '',
-                        'viewer_link': '',
-                        'coronal_mip': '',
-                        'sagittal_mip': ''
-                    })
-                
-                if missing_data:
-                    missing_df = pd.DataFrame(missing_data)
-                    hof_metadata = pd.concat([hof_metadata, missing_df], ignore_index=True)
-                    print(f"Added {len(missing_data)} placeholder entries for missing enhancers")
+                # Placeholder entries for missing enhancers, with basic info from each one's first peak row
+                first_peaks = peak_data.drop_duplicates('enhancer_id').set_index('enhancer_id')
+                coordinates = first_peaks.reindex(columns=['chr', 'start', 'end'], fill_value=0).reindex(missing_enhancers)
+                missing_df = pd.DataFrame({
+                    'enhancer_id': missing_enhancers,
+                    'chr': coordinates['chr'].to_numpy(),
+                    'start': coordinates['start'].to_numpy(),
+                    'end': coordinates['end'].to_numpy(),
+                    **PLACEHOLDER_METADATA
+                })
+                hof_metadata = pd.concat([hof_metadata, missing_df], ignore_index=True)
+                print(f"Added {len(missing_df)} placeholder entries for missing enhancers")
             
-            # Add basic statistics for each enhancer
-            enhanced_enhancers = []
-            for _, base_enhancer in hof_metadata.iterrows():
-                enhancer_id = base_enhancer['enhancer_id']
-                
-                # Get all metadata records for this enhancer from HOF metadata
-                enhancer_metadata_records = hof_metadata[hof_metadata['enhancer_id'] == enhancer_id]
-                
-                if len(enhancer_metadata_records) > 0:
-                    # Use the first record for primary metadata
-                    primary_record = enhancer_metadata_records.iloc[0]
-                    
-                    # Create comprehensive enhancer record
-                    enhanced_record = {
-                        'enhancer_id': enhancer_id,
-                        'chr': base_enhancer.get('chr', ''),
-                        'start': base_enhancer.get('start', 0),
-                        'end': base_enhancer.get('end', 0),
-                        'is_hof': True,
-                        
-                        # Core metadata fields from feather file
-                        'cargo': primary_record.get('cargo', 'Unknown'),
-                        'experiment': primary_record.get('experiment', 'Unknown'), 
-                        'proximal_gene': primary_record.get('proximal_gene', 'Unknown'),
-                        'gc_delivered': primary_record.get('gc_delivered', 'Unknown'),
-                        
-                        # Imaging metadata
-                        'image_link': primary_record.get('image_link', ''),
-                        'neuroglancer_1': primary_record.get('neuroglancer_1', ''),
-                        'neuroglancer_3': primary_record.get('neuroglancer_3', ''),
-                        'viewer_link': primary_record.get('viewer_link', ''),
-                        'coronal_mip': primary_record.get('coronal_mip', ''),
-                        'sagittal_mip': primary_record.get('sagittal_mip', ''),
-                        
-                        # Additional fields
-                        'genotype': primary_record.get('Genotype', ''),
-                        'target_cell_population': primary_record.get('Target_Cell_Population', ''),
-                        'plasmid_id': primary_record.get('Plasmid_ID', '')
-                    }
-                    enhanced_enhancers.append(enhanced_record)
-                else:
-                    print(f"WARNING: No metadata found for enhancer {enhancer_id}")
-                    
-            enhanced_hof = pd.DataFrame(enhanced_enhancers)
+            # First metadata record of every enhancer supplies the metadata of all its rows
+            primary_records = hof_metadata.drop_duplicates('enhancer_id').set_index('enhancer_id')
+            base_enhancers = hof_metadata
+            primary_rows = primary_records.reindex(base_enhancers['enhancer_id'])
+            
+            # Assemble the enhancer records column by column
+            enhanced_hof = pd.DataFrame({
+                'enhancer_id': base_enhancers['enhancer_id'].to_numpy(),
+                'chr': base_enhancers['chr'].to_numpy() if 'chr' in base_enhancers.columns else '',
+                'start': base_enhancers['start'].to_numpy() if 'start' in base_enhancers.columns else 0,
+                'end': base_enhancers['end'].to_numpy() if 'end' in base_enhancers.columns else 0,
+                'is_hof': True,
+                **{
+                    col: primary_rows[source_col].to_numpy() if source_col in primary_rows.columns else default
+                    for col, (source_col, default) in HOF_METADATA_FIELDS.items()
+                }
+            })
             print(f"Successfully created {len(enhanced_hof)} enhanced HOF enhancers")
         else:
             # Create basic enhancer info from peak data only
             print("Creating basic enhancer info from peak data (no metadata)")
+            first_peaks = peak_data.drop_duplicates('enhancer_id').set_index('enhancer_id')
             enhancer_info = []
             for enhancer_id in hof_enhancer_ids:
-                enhancer_peaks = peak_data[peak_data['enhancer_id'] == enhancer_id]
-                if not enhancer_peaks.empty:
+                if enhancer_id in first_peaks.index:
+                    first_peak = first_peaks.loc[enhancer_id]
                     enhancer_info.append({
                         'enhancer_id': enhancer_id,
-                        'chr': enhancer_peaks['chr'].iloc[0],
-                        'start': enhancer_peaks['start'].iloc[0] if 'start' in enhancer_peaks.columns else 0,
-                        'end': enhancer_peaks['end'].iloc[0] if 'end' in enhancer_peaks.columns else 0,
+                        'chr': first_peak['chr'],
+                        'start': first_peak['start'] if 'start' in first_peaks.columns else 0,
+                        'end': first_peak['end'] if 'end' in first_peaks.columns else 0,
                         'is_hof': True,
                         'cargo': 'Unknown',
                         'experiment': 'Unknown',
@@ -320,7 +520,10 @@ class DataProcessor:
             enhanced_hof = pd.DataFrame(enhancer_info)
             print(f"Created {len(enhanced_hof)} basic enhancer records")
         
-        return enhanced_hof.sort_values('enhancer_id')
+        # Records built from the sorted category list are already in order; only metadata order needs the sort
+        if enhanced_hof['enhancer_id'].is_monotonic_increasing:
+            return enhanced_hof
+        return enhanced_hof.sort_values('enhancer_id', kind='stable')
     
     def get_enhancer_summary(self, peak_data):
         """Generate comprehensive summary statistics for enhancers"""
@@ -332,8 +535,8 @@ class DataProcessor:
             'total_measurements': len(peak_data),
             'cell_types': peak_data['cell_type'].nunique() if 'cell_type' in peak_data.columns else 0,
             'chromosomes': peak_data['chr'].nunique() if 'chr' in peak_data.columns else 0,
-            'max_accessibility': peak_data['accessibility'].max() if 'accessibility' in peak_data.columns else 0,
-            'mean_accessibility': peak_data['accessibility'].mean() if 'accessibility' in peak_data.columns else 0
+            'max_accessibility': peak_data['accessibility_score'].max() if 'accessibility_score' in peak_data.columns else 0,
+            'mean_accessibility': peak_data['accessibility_score'].mean() if 'accessibility_score' in peak_data.columns else 0
         }
         
         return summary
@@ -358,9 +561,18 @@ class DataProcessor:
         
         # Check for common enhancers
         if peak_data is not None and metadata is not None:
-            peak_enhancers = set(peak_data['enhancer_id'].unique())
-            meta_enhancers = set(metadata['enhancer_id'].unique())
-            common_enhancers = peak_enhancers.intersection(meta_enhancers)
+            # Sorted array intersection; a categorical enhancer_id already holds its unique values
+            if isinstance(peak_data['enhancer_id'].dtype, pd.CategoricalDtype):
+                peak_enhancers = peak_data['enhancer_id'].cat.categories.to_numpy()
+            else:
+                peak_enhancers = np.asarray(peak_data['enhancer_id'].dropna().unique())
+            meta_enhancers = np.asarray(metadata['enhancer_id'].dropna().unique())
+            common_enhancers = np.intersect1d(peak_enhancers, meta_enhancers, assume_unique=True)
             print(f"✓ Common enhancers between datasets: {len(common_enhancers)}")
         
-        print("======================\n")
\ No newline at end of file
+        print("======================\n")
+
+
+if __name__ == "__main__":
+    # Run once to build the Parquet dataset used in place of the chunked CSV files
+    DataProcessor().convert_chunks_to_parquet()
@@ -7,10 +7,11 @@ setup(
     packages=find_packages(),
     python_requires=">=3.11",
     install_requires=[
-        "streamlit>=1.24.0",
+        "streamlit>=1.51.0",
         "pandas>=1.5.0",
         "numpy>=1.24.0",
         "plotly>=5.15.0",
+        "orjson>=3.9.0",
         "pyarrow>=12.0.0"
     ],
     entry_points={
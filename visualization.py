@@ -18,18 +18,16 @@ class VisualizationGenerator:
             '#FFB6C1', '#98FB98', '#87CEFA', '#F4A460', '#DA70D6',
             '#32CD32', '#FF69B4', '#00CED1', '#FF1493', '#00FF7F'
         ]
-        
-        # Cell type specific color mapping for consistency
-        self.cell_type_colors = {}
     
     def get_cell_type_color(self, cell_type: str, index: int) -> str:
-        """Get consistent color for cell type"""
-        if cell_type not in self.cell_type_colors:
-            self.cell_type_colors[cell_type] = self.colors[len(self.cell_type_colors) % len(self.colors)]
-        return self.cell_type_colors[cell_type]
+        """Get the color for a cell type from its rank in the figure, so a shared generator holds no per-figure state"""
+        return self.colors[index % len(self.colors)]
     
-    def create_peak_visualization(self, peak_data: pd.DataFrame, enhancer_id: str) -> go.Figure:
-        """Create a pyGenomeTracks-style visualization for peak accessibility"""
+    def create_peak_visualization(self, peak_data: pd.DataFrame, enhancer_id: str, use_webgl: bool = True) -> go.Figure:
+        """Create a pyGenomeTracks-style visualization for peak accessibility
+        
+        Tracks are drawn with WebGL (Scattergl) by default, which keeps dense tracks responsive in the browser.
+        """
         
         if peak_data.empty:
             return self.create_empty_plot("No peak data available for visualization")
@@ -66,6 +64,8 @@ class VisualizationGenerator:
         end_pos = int(peak_data.iloc[0]['end'])
         total_length = end_pos - start_pos
         
+        scatter = go.Scattergl if use_webgl else go.Scatter
+        
         # Process data for each cell type
         for i, cell_type in enumerate(cell_types, 1):
             cell_data = peak_data[peak_data['cell_type'] == cell_type].copy()
@@ -82,7 +82,7 @@ class VisualizationGenerator:
                 
                 # Create the accessibility track as a filled area plot (more genomic browser-like)
                 fig.add_trace(
-                    go.Scatter(
+                    scatter(
                         x=cell_data['genomic_position'],
                         y=cell_data['accessibility_score'],
                         mode='lines',
@@ -105,7 +105,7 @@ class VisualizationGenerator:
                 high_accessibility = cell_data[cell_data['accessibility_score'] > cell_data['accessibility_score'].quantile(0.8)]
                 if not high_accessibility.empty:
                     fig.add_trace(
-                        go.Scatter(
+                        scatter(
                             x=high_accessibility['genomic_position'],
                             y=high_accessibility['accessibility_score'],
                             mode='markers',